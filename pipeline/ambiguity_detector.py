@@ -3,30 +3,17 @@ Ambiguity Detector Module
 
 Detects whether a prompt is semantically ambiguous using LLM analysis.
 All detection is LLM-powered with no hardcoded rules.
+The analysis is served from the shared classify_all request.
 """
 
-try:
-    from pipeline.llm_interface import call_gemini_json, call_gemini_json_async
-except ImportError:
-    from llm_interface import call_gemini_json, call_gemini_json_async
+from importlib.util import find_spec
 
-
-AMBIGUITY_PROMPT = '''Analyze if the following user prompt is ambiguous or too vague.
-
-A prompt is ambiguous if:
-- It lacks specific domain context (e.g., "explain models" without specifying what kind)
-- It uses vague terms without clarification
-- It could have multiple very different interpretations
-- It's too short to understand the user's actual intent
-
-User Prompt: "{prompt}"
-
-Respond in JSON format:
-{{
-    "is_ambiguous": true/false,
-    "reason": "brief explanation of why it is or isn't ambiguous",
-    "clarification_needed": "what clarification would help (empty string if not ambiguous)"
-}}'''
+if find_spec("pipeline") is not None:
+    from pipeline.classify_all import classify_all, classify_all_async
+    from pipeline.llm_interface import run_async
+else:
+    from classify_all import classify_all, classify_all_async
+    from llm_interface import run_async
 
 
 def is_ambiguous(prompt: str) -> bool:
@@ -53,8 +40,7 @@ def detect_ambiguity(prompt: str) -> dict:
     Returns:
         Dictionary with is_ambiguous, reason, and clarification_needed.
     """
-    formatted_prompt = AMBIGUITY_PROMPT.format(prompt=prompt)
-    return call_gemini_json(formatted_prompt)
+    return classify_all(prompt).get("ambiguity", {})
 
 
 async def detect_ambiguity_async(prompt: str) -> dict:
@@ -67,13 +53,11 @@ async def detect_ambiguity_async(prompt: str) -> dict:
     Returns:
         Dictionary with is_ambiguous, reason, and clarification_needed.
     """
-    formatted_prompt = AMBIGUITY_PROMPT.format(prompt=prompt)
-    return await call_gemini_json_async(formatted_prompt)
+    result = await classify_all_async(prompt)
+    return result.get("ambiguity", {})
 
 
 if __name__ == "__main__":
-    import asyncio
-    
     tests = [
         "Explain models",
         "Explain machine learning classification models with examples",
@@ -87,4 +71,4 @@ if __name__ == "__main__":
             result = await detect_ambiguity_async(t)
             print(f"'{t}' → {result}")
     
-    asyncio.run(run_tests())
+    run_async(run_tests())
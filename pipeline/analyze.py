@@ -0,0 +1,60 @@
+"""
+Analyze Module
+
+Runs the independent per-prompt analyses (ambiguity, context,
+decomposition, intent) concurrently with asyncio.gather.
+"""
+
+import asyncio
+from importlib.util import find_spec
+
+if find_spec("pipeline") is not None:
+    from pipeline.ambiguity_detector import detect_ambiguity_async
+    from pipeline.context_handler import detect_context_need_async
+    from pipeline.decomposition_engine import decompose_prompt_async
+    from pipeline.intent_handler import detect_intents_async
+    from pipeline.llm_interface import run_async
+else:
+    from ambiguity_detector import detect_ambiguity_async
+    from context_handler import detect_context_need_async
+    from decomposition_engine import decompose_prompt_async
+    from intent_handler import detect_intents_async
+    from llm_interface import run_async
+
+
+async def analyze_prompt_async(prompt: str) -> dict:
+    """
+    Run all independent analyses for a prompt concurrently.
+
+    Args:
+        prompt: The user's input prompt.
+
+    Returns:
+        Dictionary with ambiguity, context, decomposition, and intent results.
+    """
+    ambiguity, context, decomposition, intent = await asyncio.gather(
+        detect_ambiguity_async(prompt),
+        detect_context_need_async(prompt),
+        decompose_prompt_async(prompt),
+        detect_intents_async(prompt),
+    )
+    return {
+        "ambiguity": ambiguity,
+        "context": context,
+        "decomposition": decomposition,
+        "intent": intent,
+    }
+
+
+if __name__ == "__main__":
+    tests = [
+        "Explain CNN and compare with RNN",
+        "Now modify it to use batch normalization",
+    ]
+
+    async def run_tests():
+        for t in tests:
+            result = await analyze_prompt_async(t)
+            print(f"'{t}' → {result}")
+
+    run_async(run_tests())
@@ -0,0 +1,166 @@
+"""
+Classify All Module
+
+Runs ambiguity, context, decomposition, and intent analysis for a prompt
+in a single Gemini request instead of four separate round-trips.
+The decomposition also carries per-subtask intents, aligned with the
+subtasks, so they need no follow-up request.
+The per-module detectors read their section from the shared result.
+"""
+
+from functools import lru_cache
+from importlib.util import find_spec
+
+if find_spec("pipeline") is not None:
+    from pipeline.llm_interface import call_gemini_json, call_gemini_json_async, call_gemini_json_batch, coalesce, escape_quotes, run_async, split_template
+else:
+    from llm_interface import call_gemini_json, call_gemini_json_async, call_gemini_json_batch, coalesce, escape_quotes, run_async, split_template
+
+
+INTENT_CATEGORIES = '''- explanation: User wants something explained or described
+- comparison: User wants items compared or contrasted
+- coding: User wants code written or programming help
+- analysis: User wants analytical evaluation with pros/cons
+- creative: User wants creative content (stories, poems, etc.)
+- tutorial: User wants step-by-step guidance
+- summarization: User wants content summarized
+- research: User wants information gathered
+- problem_solving: User wants help solving a problem
+- question: User is asking a question
+- instruction: User wants something created or modified'''
+
+CLASSIFY_ALL_PROMPT = '''Analyze the following user prompt in four ways.
+
+1. Ambiguity - a prompt is ambiguous if:
+- It lacks specific domain context (e.g., "explain models" without specifying what kind)
+- It uses vague terms without clarification
+- It could have multiple very different interpretations
+- It's too short to understand the user's actual intent
+
+2. Context - a prompt needs previous conversation context if:
+- It uses pronouns referring to something not mentioned (it, this, that, them)
+- It references "previous", "above", "earlier", "the last one"
+- It's a continuation command (continue, add more, modify, update, fix it)
+- It would be incomplete without knowing what came before
+
+3. Decomposition - break the prompt into actionable sub-tasks:
+- Only split if there are genuinely distinct tasks
+- Keep comparison tasks together (e.g., "compare X and Y" is ONE task, not two)
+- Each subtask should be self-contained and actionable
+- If the prompt is simple, return it as a single subtask
+- Order subtasks logically (dependencies first)
+- For each subtask, also detect its intents and instructions (categories below)
+
+4. Intent - possible intent categories:
+''' + INTENT_CATEGORIES + '''
+The instructions should tell an AI how to best respond to this prompt.
+
+User Prompt: "{prompt}"
+
+Respond with one JSON object containing keys ambiguity, context, decomposition, intent:
+{{
+    "ambiguity": {{
+        "is_ambiguous": true/false,
+        "reason": "brief explanation of why it is or isn't ambiguous",
+        "clarification_needed": "what clarification would help (empty string if not ambiguous)"
+    }},
+    "context": {{
+        "needs_context": true/false,
+        "reason": "brief explanation"
+    }},
+    "decomposition": {{
+        "subtasks": ["subtask 1", "subtask 2", ...],
+        "subtask_intents": [
+            {{
+                "intents": ["intent1", ...],
+                "primary_intent": "the most important intent of subtask i",
+                "instructions": ["specific instruction for subtask i", ...]
+            }},
+            ...
+        ],
+        "reasoning": "brief explanation of how you decomposed it"
+    }},
+    "intent": {{
+        "intents": ["intent1", "intent2", ...],
+        "primary_intent": "the most important intent",
+        "instructions": ["specific instruction 1 for optimal response", "instruction 2", ...]
+    }}
+}}'''
+
+_PROMPT_PREFIX, _PROMPT_SUFFIX = split_template(CLASSIFY_ALL_PROMPT)
+
+
+def _format_prompt(prompt: str) -> str:
+    return _PROMPT_PREFIX + escape_quotes(prompt) + _PROMPT_SUFFIX
+
+
+# In-flight async requests keyed by prompt, so concurrent callers share one call
+_pending = {}
+
+
+@lru_cache(maxsize=256)
+def classify_all(prompt: str) -> dict:
+    """
+    Run the combined analysis for a prompt (memoized per prompt).
+
+    The returned dictionary is shared between callers and must not be mutated.
+
+    Args:
+        prompt: The user's input prompt.
+
+    Returns:
+        Dictionary with ambiguity, context, decomposition, and intent sections.
+    """
+    formatted_prompt = _format_prompt(prompt)
+    # No semantic cache: subtasks are literal text from the prompt, so a
+    # similar-but-different prompt must not reuse them
+    return call_gemini_json(formatted_prompt)
+
+
+def classify_batch(prompts: list) -> list:
+    """
+    Run the combined analysis for several prompts in one Gemini request.
+    Falls back to one classify_all call per prompt if the batched
+    response does not contain one result per prompt.
+
+    Args:
+        prompts: The user prompts to analyze.
+
+    Returns:
+        List of analysis dictionaries, one per prompt, in order.
+    """
+    formatted_prompts = [_format_prompt(prompt) for prompt in prompts]
+    try:
+        return call_gemini_json_batch(formatted_prompts)
+    except ValueError:
+        return [classify_all(prompt) for prompt in prompts]
+
+
+async def classify_all_async(prompt: str) -> dict:
+    """
+    Async version of the combined analysis.
+    Concurrent calls for the same prompt are coalesced into one request.
+
+    Args:
+        prompt: The user's input prompt.
+
+    Returns:
+        Dictionary with ambiguity, context, decomposition, and intent sections.
+    """
+    formatted_prompt = _format_prompt(prompt)
+    return await coalesce(_pending, prompt, lambda: call_gemini_json_async(formatted_prompt))
+
+
+if __name__ == "__main__":
+    tests = [
+        "Explain CNN and compare with RNN",
+        "Now modify it to use batch normalization",
+        "Explain models",
+    ]
+
+    async def run_tests():
+        for t in tests:
+            result = await classify_all_async(t)
+            print(f"'{t}' → {result}")
+
+    run_async(run_tests())
@@ -3,29 +3,17 @@ Context Handler Module
 
 Detects whether a prompt requires previous conversation context using LLM analysis.
 All detection is LLM-powered with no hardcoded rules.
+The analysis is served from the shared classify_all request.
 """
 
-try:
-    from pipeline.llm_interface import call_gemini_json, call_gemini_json_async
-except ImportError:
-    from llm_interface import call_gemini_json, call_gemini_json_async
+from importlib.util import find_spec
 
-
-CONTEXT_PROMPT = '''Analyze if the following user prompt requires previous conversation context to be understood.
-
-A prompt needs context if:
-- It uses pronouns referring to something not mentioned (it, this, that, them)
-- It references "previous", "above", "earlier", "the last one"
-- It's a continuation command (continue, add more, modify, update, fix it)
-- It would be incomplete without knowing what came before
-
-User Prompt: "{prompt}"
-
-Respond in JSON format:
-{{
-    "needs_context": true/false,
-    "reason": "brief explanation"
-}}'''
+if find_spec("pipeline") is not None:
+    from pipeline.classify_all import classify_all, classify_all_async
+    from pipeline.llm_interface import run_async
+else:
+    from classify_all import classify_all, classify_all_async
+    from llm_interface import run_async
 
 
 def needs_context(prompt: str) -> bool:
@@ -52,8 +40,7 @@ def detect_context_need(prompt: str) -> dict:
     Returns:
         Dictionary with needs_context and reason.
     """
-    formatted_prompt = CONTEXT_PROMPT.format(prompt=prompt)
-    return call_gemini_json(formatted_prompt)
+    return classify_all(prompt).get("context", {})
 
 
 async def detect_context_need_async(prompt: str) -> dict:
@@ -66,13 +53,11 @@ async def detect_context_need_async(prompt: str) -> dict:
     Returns:
         Dictionary with needs_context and reason.
     """
-    formatted_prompt = CONTEXT_PROMPT.format(prompt=prompt)
-    return await call_gemini_json_async(formatted_prompt)
+    result = await classify_all_async(prompt)
+    return result.get("context", {})
 
 
 if __name__ == "__main__":
-    import asyncio
-    
     tests = [
         "Explain neural networks",
         "Now modify it to use batch normalization",
@@ -86,4 +71,4 @@ if __name__ == "__main__":
             result = await detect_context_need_async(t)
             print(f"'{t}' → {result}")
     
-    asyncio.run(run_tests())
\ No newline at end of file
+    run_async(run_tests())
\ No newline at end of file
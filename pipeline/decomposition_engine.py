@@ -3,30 +3,17 @@ Decomposition Engine Module
 
 Breaks complex prompts into multiple actionable sub-tasks using LLM analysis.
 All decomposition is LLM-powered with no hardcoded rules.
+The analysis is served from the shared classify_all request.
 """
 
-try:
-    from pipeline.llm_interface import call_gemini_json, call_gemini_json_async
-except ImportError:
-    from llm_interface import call_gemini_json, call_gemini_json_async
+from importlib.util import find_spec
 
-
-DECOMPOSITION_PROMPT = '''Break down the following user prompt into actionable sub-tasks.
-
-Rules:
-- Only split if there are genuinely distinct tasks
-- Keep comparison tasks together (e.g., "compare X and Y" is ONE task, not two)
-- Each subtask should be self-contained and actionable
-- If the prompt is simple, return it as a single subtask
-- Order subtasks logically (dependencies first)
-
-User Prompt: "{prompt}"
-
-Respond in JSON format:
-{{
-    "subtasks": ["subtask 1", "subtask 2", ...],
-    "reasoning": "brief explanation of how you decomposed it"
-}}'''
+if find_spec("pipeline") is not None:
+    from pipeline.classify_all import classify_all, classify_all_async
+    from pipeline.llm_interface import run_async
+else:
+    from classify_all import classify_all, classify_all_async
+    from llm_interface import run_async
 
 
 def decompose_prompt(prompt: str) -> list:
@@ -53,8 +40,7 @@ def decompose_prompt_full(prompt: str) -> dict:
     Returns:
         Dictionary with subtasks and reasoning.
     """
-    formatted_prompt = DECOMPOSITION_PROMPT.format(prompt=prompt)
-    return call_gemini_json(formatted_prompt)
+    return classify_all(prompt).get("decomposition", {})
 
 
 async def decompose_prompt_async(prompt: str) -> dict:
@@ -67,13 +53,11 @@ async def decompose_prompt_async(prompt: str) -> dict:
     Returns:
         Dictionary with subtasks and reasoning.
     """
-    formatted_prompt = DECOMPOSITION_PROMPT.format(prompt=prompt)
-    return await call_gemini_json_async(formatted_prompt)
+    result = await classify_all_async(prompt)
+    return result.get("decomposition", {})
 
 
 if __name__ == "__main__":
-    import asyncio
-    
     tests = [
         "Explain CNN and compare with RNN",
         "Summarize this article, then analyze key ideas, and write code to implement it",
@@ -87,4 +71,4 @@ if __name__ == "__main__":
             result = await decompose_prompt_async(t)
             print(f"'{t}' → {result}")
     
-    asyncio.run(run_tests())
+    run_async(run_tests())
@@ -1,60 +1,203 @@
+import os
+import functools
 import faiss
 import numpy as np
 import re
+import string
 from typing import List
 from sentence_transformers import SentenceTransformer
 
+try:
+    import onnxruntime as ort
+    from transformers import AutoTokenizer
+except ImportError:
+    ort = None
+
+
+# Text-cleaning patterns and tables, built once at import.
+# "_" is a word character, so it is kept along with "." and ",".
+# Both stay on stdlib re: its \s and \S are Unicode-aware (\xa0, \u3000, ...),
+# while RE2's are ASCII-only and would change what is stripped and collapsed
+_URL_RE = re.compile(r"http\S+")
+_WS_RE = re.compile(r"\s+")
+# Code points str.split() treats as whitespace (all are below U+3001)
+_WHITESPACE_CODES = np.array(
+    [c for c in range(0x3001) if chr(c).isspace()], dtype=np.uint32
+)
+# The table only covers ASCII punctuation; non-ASCII text takes the regex path
+_PUNCT_TABLE = str.maketrans({c: None for c in string.punctuation if c not in ".,_"})
+_PUNCT_RE = re.compile(r"[^\w\s.,]")
+
+
+@functools.lru_cache(maxsize=4)
+def load_embedding_model(embedding_model: str) -> SentenceTransformer:
+    """
+    Load a SentenceTransformer once per model name and share it.
+    On CUDA the weights are cast to fp16 to halve memory and bandwidth.
+    """
+    model = SentenceTransformer(embedding_model)
+    if model.device.type == "cuda":
+        model.half()
+    return model
+
+
+def _num_gpus() -> int:
+    # faiss-cpu builds may not expose the GPU API at all
+    get_num_gpus = getattr(faiss, "get_num_gpus", None)
+    return get_num_gpus() if get_num_gpus else 0
+
+
+def _hub_name(embedding_model: str) -> str:
+    if "/" in embedding_model:
+        return embedding_model
+    return f"sentence-transformers/{embedding_model}"
+
+
+def export_onnx_model(embedding_model: str, output_dir: str) -> str:
+    """
+    One-time export of a sentence-transformers model to int8 ONNX.
+    Requires `optimum[onnxruntime]`. Returns the quantized model path.
+    """
+    from optimum.onnxruntime import ORTModelForFeatureExtraction, ORTQuantizer
+    from optimum.onnxruntime.configuration import AutoQuantizationConfig
+
+    model = ORTModelForFeatureExtraction.from_pretrained(
+        _hub_name(embedding_model), export=True
+    )
+    model.save_pretrained(output_dir)
+
+    quantizer = ORTQuantizer.from_pretrained(model)
+    qconfig = AutoQuantizationConfig.avx512_vnni(is_static=False, per_channel=False)
+    quantizer.quantize(save_dir=output_dir, quantization_config=qconfig)
+    return os.path.join(output_dir, "model_quantized.onnx")
+
+
+class OnnxEncoder:
+    """
+    ONNX Runtime replacement for SentenceTransformer.encode.
+    tokenize -> ORT run -> mean-pool -> L2-normalize
+    """
+
+    def __init__(self, model_path: str, embedding_model: str, max_seq_length: int = 256):
+        if ort is None:
+            raise ImportError("onnxruntime and transformers are required for OnnxEncoder.")
+
+        options = ort.SessionOptions()
+        options.intra_op_num_threads = os.cpu_count()
+        self.session = ort.InferenceSession(
+            model_path,
+            sess_options=options,
+            providers=["CPUExecutionProvider"]
+        )
+        self.input_names = {i.name for i in self.session.get_inputs()}
+        self.tokenizer = AutoTokenizer.from_pretrained(_hub_name(embedding_model))
+        self.max_seq_length = max_seq_length
+
+    def encode(
+        self,
+        texts: List[str],
+        batch_size: int = 32,
+        convert_to_numpy: bool = True,
+        normalize_embeddings: bool = False
+    ) -> np.ndarray:
+        batches = []
+
+        for start in range(0, len(texts), batch_size):
+            tokens = self.tokenizer(
+                texts[start:start + batch_size],
+                padding=True,
+                truncation=True,
+                max_length=self.max_seq_length,
+                return_tensors="np"
+            )
+            feeds = {
+                name: value.astype(np.int64)
+                for name, value in tokens.items()
+                if name in self.input_names
+            }
+            hidden = self.session.run(None, feeds)[0]
+
+            mask = tokens["attention_mask"][..., None].astype(np.float32)
+            pooled = (hidden * mask).sum(axis=1) / np.clip(mask.sum(axis=1), 1e-9, None)
+            if normalize_embeddings:
+                pooled /= np.clip(np.linalg.norm(pooled, axis=1, keepdims=True), 1e-12, None)
+            batches.append(pooled.astype(np.float32))
+
+        return np.concatenate(batches)
+
 
 class VectorStore:
     """
     Lightweight FAISS-based vector store for text data.
     Pipeline:
     raw text -> cleaning -> chunking -> embeddings -> FAISS index
+
+    index_type selects the FAISS index:
+    "hnsw" (approximate, logarithmic search), "sq8" (8-bit scalar
+    quantized, 4x less memory) or "flat" (exact brute-force search).
+    Only "flat" is moved to a GPU when one is available.
+
+    If onnx_model_path is given (see export_onnx_model), embeddings are
+    computed with ONNX Runtime instead of PyTorch.
     """
 
     def __init__(
         self,
         embedding_model: str = "all-MiniLM-L6-v2",
         chunk_size: int = 300,
-        overlap: int = 50
+        overlap: int = 50,
+        index_type: str = "hnsw",
+        onnx_model_path: str = None
     ):
-        self.model = SentenceTransformer(embedding_model)
+        if onnx_model_path:
+            self.model = OnnxEncoder(onnx_model_path, embedding_model)
+        else:
+            self.model = load_embedding_model(embedding_model)
         self.chunk_size = chunk_size
         self.overlap = overlap
+        self.index_type = index_type
 
         self.index = None
+        self._gpu_resources = None
         self.chunks: List[str] = []
         self.dim = None
 
    
     def clean_text(self, text: str) -> str:
-        text = text.lower()
-        text = re.sub(r"http\S+", "", text)
-        text = re.sub(r"\s+", " ", text)
-        text = re.sub(r"[^\w\s.,]", "", text)
-        return text.strip()
+        text = _URL_RE.sub("", text.lower())
+        if text.isascii():
+            text = text.translate(_PUNCT_TABLE)
+        else:
+            text = _PUNCT_RE.sub("", text)
+        return _WS_RE.sub(" ", text).strip()
 
    
     def chunk_text(self, text: str) -> List[str]:
-        words = text.split()
-        chunks = []
+        # Word boundaries from one vectorized whitespace scan over the
+        # code points; each chunk is a single slice of the input string
+        codes = np.frombuffer(text.encode("utf-32-le"), dtype=np.uint32)
+        is_space = np.isin(codes, _WHITESPACE_CODES)
+        edges = np.diff(np.concatenate(([True], is_space, [True])).astype(np.int8))
+        word_starts = np.flatnonzero(edges == -1)
+        word_ends = np.flatnonzero(edges == 1)
 
-        start = 0
-        while start < len(words):
-            end = start + self.chunk_size
-            chunk = words[start:end]
-            chunks.append(" ".join(chunk))
-            start += self.chunk_size - self.overlap
-
-        return chunks
+        n_words = len(word_starts)
+        step = self.chunk_size - self.overlap
+        return [
+            text[word_starts[start]:word_ends[min(start + self.chunk_size, n_words) - 1]]
+            for start in range(0, n_words, step)
+        ]
 
     
-    def embed(self, texts: List[str]) -> np.ndarray:
-        return self.model.encode(
+    def embed(self, texts: List[str], batch_size: int = 32) -> np.ndarray:
+        embeddings = self.model.encode(
             texts,
+            batch_size=batch_size,
             convert_to_numpy=True,
             normalize_embeddings=True
         )
+        # FAISS needs float32 (fp16 models return float16)
+        return np.ascontiguousarray(embeddings, dtype=np.float32)
 
     
     def build(self, raw_texts: List[str]):
@@ -67,38 +210,78 @@ class VectorStore:
         embeddings = self.embed(self.chunks)
         self.dim = embeddings.shape[1]
 
-        self.index = faiss.IndexFlatIP(self.dim)
+        index = self._create_index(embeddings)
+        # Only the flat index moves to GPU: GPU FAISS has no HNSW, and
+        # index_cpu_to_gpu rejects an 8-bit scalar quantizer
+        if self.index_type == "flat" and _num_gpus() > 0:
+            self._gpu_resources = faiss.StandardGpuResources()
+            index = faiss.index_cpu_to_gpu(self._gpu_resources, 0, index)
+
+        self.index = index
         self.index.add(embeddings)
 
+    
+    def _create_index(self, embeddings: np.ndarray):
+        # Embeddings are L2-normalized, so inner product is cosine similarity
+        if self.index_type == "flat":
+            return faiss.IndexFlatIP(self.dim)
+
+        if self.index_type == "sq8":
+            index = faiss.IndexScalarQuantizer(
+                self.dim, faiss.ScalarQuantizer.QT_8bit, faiss.METRIC_INNER_PRODUCT
+            )
+            index.train(embeddings)
+            return index
+
+        if self.index_type == "hnsw":
+            index = faiss.IndexHNSWFlat(self.dim, 32, faiss.METRIC_INNER_PRODUCT)
+            index.hnsw.efConstruction = 200
+            index.hnsw.efSearch = 64
+            return index
+
+        raise ValueError(f"Unknown index_type: {self.index_type}")
+
    
     def search(self, query: str, top_k: int = 5):
+        return self.search_batch([query], top_k)[0]
+
+    
+    def search_batch(self, queries: List[str], top_k: int = 5):
         if self.index is None:
             raise ValueError("Index not built yet. Call build() first.")
 
-        query = self.clean_text(query)
-        q_emb = self.embed([query])
+        cleaned = [self.clean_text(q) for q in queries]
+        q_emb = self.embed(cleaned, batch_size=max(len(cleaned), 1))
 
         scores, indices = self.index.search(q_emb, top_k)
 
-        results = []
-        for idx, score in zip(indices[0], scores[0]):
-            results.append({
-                "text": self.chunks[idx],
-                "score": float(score)
-            })
+        all_results = []
+        for row_indices, row_scores in zip(indices, scores):
+            results = []
+            for idx, score in zip(row_indices, row_scores):
+                # FAISS pads with -1 when the index holds fewer than top_k vectors
+                if idx < 0:
+                    continue
+                results.append({
+                    "text": self.chunks[idx],
+                    "score": float(score)
+                })
+            all_results.append(results)
+
+        return all_results
 
-        return results
 
-docs = [
-    "The ALM optimization minimizes NII variance subject to duration constraints.",
-    "Marketing ROI analysis focuses on conversion rate and CAC.",
-    "Gradient descent minimizes loss functions in neural networks."
-]
+if __name__ == "__main__":
+    docs = [
+        "The ALM optimization minimizes NII variance subject to duration constraints.",
+        "Marketing ROI analysis focuses on conversion rate and CAC.",
+        "Gradient descent minimizes loss functions in neural networks."
+    ]
 
-vs = VectorStore()
-vs.build(docs)
+    vs = VectorStore()
+    vs.build(docs)
 
-results = vs.search("optimize hedge portfolio")
+    results = vs.search("optimize hedge portfolio")
 
-for r in results:
-    print(r)
\ No newline at end of file
+    for r in results:
+        print(r)
@@ -0,0 +1,40 @@
+"""
+Prompt Features Module
+
+Tokenizes a prompt once so the rule-based checks in the scoring engine
+and the optimizer share one pass over the text instead of each
+re-lowering and re-splitting it.
+"""
+
+import re
+from typing import NamedTuple
+
+_WORD_RE = re.compile(r"[a-z0-9_+#]+")
+
+
+class PromptFeatures(NamedTuple):
+    """
+    Precomputed views of a prompt used by the rule-based checks.
+    token_set holds the lowercase keyword tokens (punctuation stripped),
+    while word_count counts whitespace-separated words, so "state-of-the-art"
+    is several tokens but one word.
+    """
+    raw: str
+    token_set: frozenset
+    word_count: int
+
+
+def featurize(prompt) -> PromptFeatures:
+    """
+    Compute the shared features for a prompt.
+    
+    Args:
+        prompt: The user prompt, or features already computed for it.
+        
+    Returns:
+        The prompt's PromptFeatures (returned as-is if already computed).
+    """
+    if isinstance(prompt, PromptFeatures):
+        return prompt
+    tokens = _WORD_RE.findall(prompt.lower())
+    return PromptFeatures(prompt, frozenset(tokens), len(prompt.split()))
@@ -3,39 +3,39 @@ Intent Handler Module
 
 Detects user intents and generates appropriate instructions using LLM analysis.
 All intent detection is LLM-powered with no hardcoded keyword lists.
+The analysis is served from the shared classify_all request.
 """
 
-try:
-    from pipeline.llm_interface import call_gemini_json, call_gemini_json_async
-except ImportError:
-    from llm_interface import call_gemini_json, call_gemini_json_async
+import asyncio
+from importlib.util import find_spec
 
+if find_spec("pipeline") is not None:
+    from pipeline.classify_all import INTENT_CATEGORIES, classify_all, classify_all_async
+    from pipeline.llm_interface import call_gemini_json, call_gemini_json_async, run_async
+else:
+    from classify_all import INTENT_CATEGORIES, classify_all, classify_all_async
+    from llm_interface import call_gemini_json, call_gemini_json_async, run_async
 
-INTENT_PROMPT = '''Analyze the following user prompt to detect intents and generate instructions.
+
+INTENT_BATCH_PROMPT = '''For each of the following numbered sub-tasks, detect its intents and generate instructions.
 
 Possible intent categories:
-- explanation: User wants something explained or described
-- comparison: User wants items compared or contrasted
-- coding: User wants code written or programming help
-- analysis: User wants analytical evaluation with pros/cons
-- creative: User wants creative content (stories, poems, etc.)
-- tutorial: User wants step-by-step guidance
-- summarization: User wants content summarized
-- research: User wants information gathered
-- problem_solving: User wants help solving a problem
-- question: User is asking a question
-- instruction: User wants something created or modified
-
-User Prompt: "{prompt}"
-
-Respond in JSON format:
-{{
-    "intents": ["intent1", "intent2", ...],
-    "primary_intent": "the most important intent",
-    "instructions": ["specific instruction 1 for optimal response", "instruction 2", ...]
-}}
-
-The instructions should tell an AI how to best respond to this prompt.'''
+{categories}
+
+Sub-tasks:
+{subtasks}
+
+Respond with a JSON array where element i is the result for sub-task i, in order:
+[
+    {{
+        "intents": ["intent1", "intent2", ...],
+        "primary_intent": "the most important intent",
+        "instructions": ["specific instruction 1 for optimal response", "instruction 2", ...]
+    }},
+    ...
+]
+
+The instructions should tell an AI how to best respond to each sub-task.'''
 
 
 def detect_intent(prompt: str) -> str:
@@ -76,8 +76,7 @@ def detect_intents_full(prompt: str) -> dict:
     Returns:
         Dictionary with intents, primary_intent, and instructions.
     """
-    formatted_prompt = INTENT_PROMPT.format(prompt=prompt)
-    return call_gemini_json(formatted_prompt)
+    return classify_all(prompt).get("intent", {})
 
 
 async def detect_intents_async(prompt: str) -> dict:
@@ -90,13 +89,73 @@ async def detect_intents_async(prompt: str) -> dict:
     Returns:
         Dictionary with intents, primary_intent, and instructions.
     """
-    formatted_prompt = INTENT_PROMPT.format(prompt=prompt)
-    return await call_gemini_json_async(formatted_prompt)
+    result = await classify_all_async(prompt)
+    return result.get("intent", {})
 
 
-if __name__ == "__main__":
-    import asyncio
+def _format_batch_prompt(subtasks: list) -> str:
+    numbered = "\n".join(f"{i}. {subtask}" for i, subtask in enumerate(subtasks, 1))
+    return INTENT_BATCH_PROMPT.format(categories=INTENT_CATEGORIES, subtasks=numbered)
+
+
+def _is_valid_batch(result, subtasks: list) -> bool:
+    return (
+        isinstance(result, list)
+        and len(result) == len(subtasks)
+        and all(isinstance(item, dict) for item in result)
+    )
+
+
+def detect_intents_batch(subtasks: list) -> list:
+    """
+    Detect intents and instructions for several sub-tasks in one LLM call.
+    Falls back to one detection per sub-task if the response shape is wrong.
     
+    Args:
+        subtasks: The sub-task prompts to classify.
+        
+    Returns:
+        List of dictionaries with intents, primary_intent, and instructions,
+        one per sub-task, in order.
+    """
+    if len(subtasks) > 1:
+        try:
+            result = call_gemini_json(_format_batch_prompt(subtasks))
+        except ValueError:
+            result = None
+        if _is_valid_batch(result, subtasks):
+            return result
+    return [detect_intents_full(subtask) for subtask in subtasks]
+
+
+async def detect_intents_batch_async(subtasks: list, precomputed: list = None) -> list:
+    """
+    Async version of batched sub-task intent detection.
+    
+    Args:
+        subtasks: The sub-task prompts to classify.
+        precomputed: Optional per-sub-task results already returned by
+            classify_all; used as-is when they line up with the sub-tasks.
+        
+    Returns:
+        List of dictionaries with intents, primary_intent, and instructions,
+        one per sub-task, in order.
+    """
+    if _is_valid_batch(precomputed, subtasks):
+        return precomputed
+    if len(subtasks) > 1:
+        try:
+            result = await call_gemini_json_async(_format_batch_prompt(subtasks))
+        except ValueError:
+            result = None
+        if _is_valid_batch(result, subtasks):
+            return result
+    return list(await asyncio.gather(
+        *(detect_intents_async(subtask) for subtask in subtasks)
+    ))
+
+
+if __name__ == "__main__":
     tests = [
         "Explain CNN",
         "Difference between CNN vs RNN and analyze performance",
@@ -114,4 +173,4 @@ if __name__ == "__main__":
             print(f"  Instructions: {result.get('instructions', [])}")
             print()
     
-    asyncio.run(run_tests())
+    run_async(run_tests())
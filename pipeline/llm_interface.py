@@ -9,54 +9,423 @@ Supports both sync and async operations for parallel processing.
 import os
 import json
 import asyncio
+import atexit
+import logging
+import hashlib
+import tempfile
+import threading
 import time
+import uuid
+from functools import lru_cache
+from importlib.util import find_spec
+import faiss
+import numpy as np
+from diskcache import Cache
 from dotenv import load_dotenv
 import google.generativeai as genai
 
+try:
+    import uvloop
+except ImportError:
+    uvloop = None
+
+try:
+    # orjson: faster parsing; its JSONDecodeError subclasses json.JSONDecodeError
+    import orjson
+    _json_loads = orjson.loads
+except ImportError:
+    _json_loads = json.loads
+
 # Load environment variables from .env file
 load_dotenv()
 
-# Global model instance for reuse
-_model = None
+logger = logging.getLogger(__name__)
+
+# Model instances for reuse, one per (model name, system instruction)
+GEMINI_MODEL = "gemini-2.0-flash"
+_models = {}
+_configured = False
 
 # Semaphore to limit concurrent API requests (prevent rate limiting)
-MAX_CONCURRENT_REQUESTS = 3
+MAX_CONCURRENT_REQUESTS = int(os.getenv("GEMINI_MAX_CONCURRENT_REQUESTS", "3"))
 _semaphore = None
+_semaphore_loop = None
+
+# One long-lived event loop (on a daemon thread) that run_async submits to.
+# The SDK's async gRPC client binds to the loop it was first used on, so a
+# fresh loop per call would break every call after the first.
+_loop = None
+_loop_lock = threading.Lock()
+
+# Persistent exact-match cache for LLM responses, shared across processes.
+# Set GEMINI_CACHE_DISABLE=1 to bypass it.
+GEMINI_CACHE_DIR = os.getenv("GEMINI_CACHE_DIR", os.path.join(tempfile.gettempdir(), "gemini_cache"))
+GEMINI_CACHE_EXPIRE = 7 * 24 * 3600
+GEMINI_CACHE_DISABLED = os.getenv("GEMINI_CACHE_DISABLE") == "1"
+_disk_cache = None
+
+# Semantic cache for JSON responses, one per namespace (prompt template).
+# Only for results that do not quote the prompt text back (e.g. scores):
+# a similar prompt would otherwise receive another prompt's literal text.
+SEMANTIC_CACHE_DIR = os.getenv("SEMANTIC_CACHE_DIR", ".semantic_cache")
+SEMANTIC_CACHE_THRESHOLD = 0.95
+EMBEDDING_MODEL = "all-MiniLM-L6-v2"
+# New entries are written as a segment file once this many have accumulated (and at exit)
+SEMANTIC_CACHE_FLUSH_EVERY = 32
+_semantic_caches = {}
+_semantic_caches_lock = threading.Lock()
 
 
 def _get_semaphore():
-    """Get or create the async semaphore for rate limiting."""
-    global _semaphore
-    if _semaphore is None:
+    """
+    Get or create the async semaphore for rate limiting.
+    A semaphore is bound to one event loop, so a new one is created
+    whenever the running loop changes (e.g. a caller using its own loop).
+    """
+    global _semaphore, _semaphore_loop
+    loop = asyncio.get_running_loop()
+    if _semaphore is None or _semaphore_loop is not loop:
         _semaphore = asyncio.Semaphore(MAX_CONCURRENT_REQUESTS)
+        _semaphore_loop = loop
     return _semaphore
 
 
-def _get_model():
-    """Get or create the Gemini model instance."""
-    global _model
-    if _model is None:
-        api_key = os.getenv("GEMINI_API_KEY")
-        if not api_key:
-            raise ValueError("GEMINI_API_KEY not set in environment variables.")
-        genai.configure(api_key=api_key)
-        _model = genai.GenerativeModel("gemini-2.0-flash")
-    return _model
+def _get_loop():
+    """Get or start the shared background event loop."""
+    global _loop
+    with _loop_lock:
+        if _loop is None:
+            # Create the loop directly rather than via a (process-wide) policy
+            _loop = uvloop.new_event_loop() if uvloop is not None else asyncio.new_event_loop()
+            threading.Thread(target=_loop.run_forever, name="llm-event-loop", daemon=True).start()
+        return _loop
+
+
+def run_async(coro):
+    """
+    Run a coroutine to completion from synchronous code.
+    Every call runs on the same background event loop, so async clients
+    and caches tied to a loop stay usable across calls (and threads).
+    Uses uvloop's faster event loop when it is installed.
+    
+    Args:
+        coro: The coroutine to run.
+        
+    Returns:
+        The coroutine's result.
+        
+    Raises:
+        RuntimeError: If called from a coroutine running on that loop.
+    """
+    loop = _get_loop()
+    try:
+        running = asyncio.get_running_loop()
+    except RuntimeError:
+        running = None
+    if running is loop:
+        coro.close()
+        raise RuntimeError("run_async() cannot be called from the shared event loop; await the coroutine instead")
+    return asyncio.run_coroutine_threadsafe(coro, loop).result()
+
+
+def coalesce(pending: dict, key, make_coro):
+    """
+    Share one in-flight request between concurrent callers with the same key.
+    Each caller gets a shielded view, so a caller that is cancelled or times
+    out does not cancel the request for the others.
+    
+    Args:
+        pending: Dict of in-flight futures owned by the caller's module.
+        key: Request identity (e.g. the prompt).
+        make_coro: Zero-argument callable creating the request coroutine.
+        
+    Returns:
+        A future for the request; await it to get the result.
+    """
+    loop = asyncio.get_running_loop()
+    future = pending.get(key)
+    if future is None or future.get_loop() is not loop:
+        future = asyncio.ensure_future(make_coro())
+        pending[key] = future
+        
+        def _forget(done):
+            if pending.get(key) is done:
+                del pending[key]
+        
+        future.add_done_callback(_forget)
+    return asyncio.shield(future)
+
+
+def split_template(template: str) -> tuple:
+    """
+    Split a single-field `{prompt}` format template into literal parts.
+    `prefix + prompt + suffix` then builds the same string as
+    `template.format(prompt=prompt)` without reparsing the template.
+    
+    Args:
+        template: A str.format template containing exactly one {prompt} field.
+        
+    Returns:
+        A (prefix, suffix) tuple with doubled braces unescaped.
+    """
+    prefix, suffix = template.split("{prompt}")
+    return tuple(
+        part.replace("{{", "{").replace("}}", "}")
+        for part in (prefix, suffix)
+    )
+
+
+def escape_quotes(text: str) -> str:
+    """Backslash-escape double quotes so text cannot close a quoted template field early."""
+    return text.replace('"', '\\"')
+
+
+def _get_model(model_name: str = GEMINI_MODEL, system_instruction: str = None):
+    """Get or create the Gemini model instance for a model name and system instruction."""
+    global _configured
+    model = _models.get((model_name, system_instruction))
+    if model is None:
+        if not _configured:
+            api_key = os.getenv("GEMINI_API_KEY")
+            if not api_key:
+                raise ValueError("GEMINI_API_KEY not set in environment variables.")
+            genai.configure(api_key=api_key)
+            _configured = True
+        model = genai.GenerativeModel(model_name, system_instruction=system_instruction)
+        _models[(model_name, system_instruction)] = model
+    return model
+
+
+def _get_disk_cache():
+    """Get or create the on-disk response cache (None when disabled)."""
+    global _disk_cache
+    if _disk_cache is None and not GEMINI_CACHE_DISABLED:
+        _disk_cache = Cache(GEMINI_CACHE_DIR)
+    return _disk_cache
+
+
+def _cache_key(kind: str, prompt: str, system_instruction: str = None) -> str:
+    """Hash the response kind, model name, system instruction, and prompt into a disk cache key."""
+    raw = f"{kind}\0{GEMINI_MODEL}\0{system_instruction or ''}\0{prompt}".encode()
+    return hashlib.blake2b(raw, digest_size=16).hexdigest()
+
 
+def _cache_get(key: str):
+    disk_cache = _get_disk_cache()
+    return disk_cache.get(key) if disk_cache is not None else None
 
-def call_gemini(prompt: str, max_retries: int = 3) -> str:
+
+def _cache_set(key: str, value):
+    disk_cache = _get_disk_cache()
+    if disk_cache is not None:
+        disk_cache.set(key, value, expire=GEMINI_CACHE_EXPIRE)
+
+
+def _get_encoder():
+    """Get the shared sentence embedding model used by the semantic cache."""
+    # Imported lazily: loading sentence-transformers pulls in torch
+    if find_spec("pipeline") is not None:
+        from pipeline.embed import load_embedding_model
+    else:
+        from embed import load_embedding_model
+    return load_embedding_model(EMBEDDING_MODEL)
+
+
+class SemanticCache:
+    """
+    Embedding-similarity cache for parsed JSON LLM responses.
+    Keys are embedded with a normalized sentence encoder and stored in a
+    FAISS inner-product index, so a lookup returns the response of the most
+    similar cached key when its cosine similarity reaches the threshold.
+    
+    On disk, each flush appends a new segment file holding only the entries
+    added since the previous flush. Existing files are never rewritten, so
+    processes sharing the directory do not overwrite each other's entries,
+    and all segments are merged on load.
+    """
+
+    def __init__(self, path: str = None, threshold: float = SEMANTIC_CACHE_THRESHOLD):
+        self.path = path
+        self.threshold = threshold
+        self._lock = threading.Lock()
+        self.index = faiss.IndexFlatIP(_get_encoder().get_sentence_embedding_dimension())
+        self.responses = []
+        self._unsaved_embeddings = []
+        self._unsaved_responses = []
+        if path:
+            self._load()
+
+    def embed(self, text: str):
+        """Embed a cache key as a normalized (1, dim) float32 array."""
+        embedding = _get_encoder().encode(
+            [text],
+            convert_to_numpy=True,
+            normalize_embeddings=True
+        )
+        return np.ascontiguousarray(embedding, dtype=np.float32)
+
+    def lookup(self, embedding):
+        """Return the cached response closest to the embedding, or None."""
+        with self._lock:
+            if self.index.ntotal == 0:
+                return None
+            scores, indices = self.index.search(embedding, 1)
+            if scores[0][0] >= self.threshold:
+                return self.responses[indices[0][0]]
+        return None
+
+    def add(self, embedding, response: dict):
+        """Store a response under the given key embedding (persisted on the next flush)."""
+        with self._lock:
+            self.index.add(embedding)
+            self.responses.append(response)
+            if not self.path:
+                return
+            self._unsaved_embeddings.append(embedding)
+            self._unsaved_responses.append(response)
+            should_flush = len(self._unsaved_responses) >= SEMANTIC_CACHE_FLUSH_EVERY
+        if should_flush:
+            self.flush()
+
+    def flush(self):
+        """Write the entries added since the last flush as a new segment file."""
+        with self._lock:
+            if not self._unsaved_responses:
+                return
+            embeddings = np.concatenate(self._unsaved_embeddings)
+            responses = self._unsaved_responses
+            self._unsaved_embeddings = []
+            self._unsaved_responses = []
+
+        def write_segment(path):
+            with open(path, "wb") as f:
+                np.savez(f, embeddings=embeddings, responses=np.array(json.dumps(responses)))
+
+        os.makedirs(self.path, exist_ok=True)
+        segment_file = os.path.join(self.path, f"{os.getpid()}-{uuid.uuid4().hex}.npz")
+        _replace_file(segment_file, write_segment)
+
+    def _load(self):
+        """Merge every segment in the cache directory, including other processes' ones."""
+        if not os.path.isdir(self.path):
+            return
+        for name in sorted(os.listdir(self.path)):
+            if not name.endswith(".npz"):
+                continue
+            try:
+                with np.load(os.path.join(self.path, name)) as segment:
+                    embeddings = np.ascontiguousarray(segment["embeddings"], dtype=np.float32)
+                    responses = json.loads(str(segment["responses"]))
+            except Exception as e:  # a damaged segment only costs cache hits
+                logger.warning("Skipping unreadable semantic cache segment %s: %s", name, e)
+                continue
+            if embeddings.ndim != 2 or embeddings.shape != (len(responses), self.index.d):
+                logger.warning("Skipping inconsistent semantic cache segment %s", name)
+                continue
+            self.index.add(embeddings)
+            self.responses.extend(responses)
+
+
+def _replace_file(path: str, write):
+    """Write a file through a temporary file in the same directory, then swap it in atomically."""
+    fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix=".tmp")
+    os.close(fd)
+    try:
+        write(tmp_path)
+        os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+
+def semantic_namespace(name: str, template: str) -> str:
+    """
+    Build a semantic cache namespace tied to a prompt template version.
+    Changing the template (or the embedding model) starts a fresh cache
+    instead of serving responses in an old schema.
+    
+    Args:
+        name: Readable namespace prefix (e.g. "score").
+        template: The prompt template whose responses are cached.
+        
+    Returns:
+        A namespace like "score-1a2b3c4d".
+    """
+    digest = hashlib.blake2b(f"{EMBEDDING_MODEL}\0{template}".encode(), digest_size=4).hexdigest()
+    return f"{name}-{digest}"
+
+
+def _get_semantic_cache(namespace: str) -> SemanticCache:
+    """Get or create the persistent semantic cache for a namespace."""
+    with _semantic_caches_lock:
+        cache = _semantic_caches.get(namespace)
+        if cache is None:
+            cache = SemanticCache(os.path.join(SEMANTIC_CACHE_DIR, namespace))
+            _semantic_caches[namespace] = cache
+        return cache
+
+
+@atexit.register
+def _flush_semantic_caches():
+    with _semantic_caches_lock:
+        caches = list(_semantic_caches.values())
+    for cache in caches:
+        cache.flush()
+
+
+def preload_semantic_cache(namespace: str) -> threading.Thread:
+    """
+    Load the embedding model and a namespace's semantic cache in a
+    background thread, so the first lookup (e.g. under a scoring timeout)
+    does not pay for importing torch and loading the encoder.
+    A lookup that arrives while loading is in progress waits for it.
+    
+    Args:
+        namespace: The semantic cache namespace to load.
+        
+    Returns:
+        The started daemon thread.
+    """
+    def load():
+        try:
+            _get_semantic_cache(namespace)
+        except Exception as e:
+            logger.warning("Semantic cache preload for %s failed: %s", namespace, e)
+    
+    thread = threading.Thread(target=load, name=f"preload-{namespace}", daemon=True)
+    thread.start()
+    return thread
+
+
+def call_gemini(prompt: str, max_retries: int = 3, system_instruction: str = None) -> str:
     """
     Call the Gemini LLM with the given prompt (synchronous).
     Includes retry logic with exponential backoff for rate limiting.
+    Responses are cached on disk, keyed by model name and prompt.
     
     Args:
         prompt: The prompt to send to the LLM.
         max_retries: Maximum number of retry attempts.
+        system_instruction: Optional fixed instruction sent as the system
+            prompt, kept separate from the prompt so its prefix can be cached.
         
     Returns:
         The text response from the LLM.
     """
-    model = _get_model()
+    key = _cache_key("text", prompt, system_instruction)
+    cached = _cache_get(key)
+    if cached is not None:
+        return cached
+    
+    text = _generate_content(prompt, max_retries, system_instruction)
+    _cache_set(key, text)
+    return text
+
+
+def _generate_content(prompt: str, max_retries: int, system_instruction: str = None) -> str:
+    """Call Gemini with retries and exponential backoff on rate limiting."""
+    model = _get_model(system_instruction=system_instruction)
     
     for attempt in range(max_retries):
         try:
@@ -65,7 +434,7 @@ def call_gemini(prompt: str, max_retries: int = 3) -> str:
         except Exception as e:
             if "429" in str(e) or "RESOURCE_EXHAUSTED" in str(e):
                 wait_time = (2 ** attempt) + 1  # Exponential backoff: 2, 3, 5 seconds
-                print(f"[Rate limit hit, waiting {wait_time}s before retry {attempt + 1}/{max_retries}]")
+                logger.warning("Rate limit hit, waiting %ds before retry %d/%d", wait_time, attempt + 1, max_retries)
                 time.sleep(wait_time)
             else:
                 raise e
@@ -75,63 +444,217 @@ def call_gemini(prompt: str, max_retries: int = 3) -> str:
     return response.text
 
 
-async def call_gemini_async(prompt: str) -> str:
+async def call_gemini_async(prompt: str, max_retries: int = 3, system_instruction: str = None) -> str:
     """
     Call the Gemini LLM with the given prompt (asynchronous).
-    Uses asyncio to run the sync call in a thread pool for parallelism.
+    Uses the SDK's native async client, so no thread is held per request.
     Uses semaphore to limit concurrent requests and prevent rate limiting.
+    Shares the on-disk response cache with call_gemini; its file I/O runs
+    in a worker thread so it does not block the event loop.
     
     Args:
         prompt: The prompt to send to the LLM.
+        max_retries: Maximum number of retry attempts.
+        system_instruction: Optional fixed instruction sent as the system
+            prompt, kept separate from the prompt so its prefix can be cached.
         
     Returns:
         The text response from the LLM.
     """
+    loop = asyncio.get_running_loop()
+    key = _cache_key("text", prompt, system_instruction)
+    cached = await loop.run_in_executor(None, _cache_get, key)
+    if cached is not None:
+        return cached
+    
     semaphore = _get_semaphore()
     async with semaphore:
-        loop = asyncio.get_event_loop()
-        return await loop.run_in_executor(None, call_gemini, prompt)
+        text = await _generate_content_async(prompt, max_retries, system_instruction)
+    await loop.run_in_executor(None, _cache_set, key, text)
+    return text
 
 
-def call_gemini_json(prompt: str) -> dict:
+async def _generate_content_async(prompt: str, max_retries: int, system_instruction: str = None) -> str:
+    """Async Gemini call with retries and exponential backoff on rate limiting."""
+    model = _get_model(system_instruction=system_instruction)
+    
+    for attempt in range(max_retries):
+        try:
+            response = await model.generate_content_async(prompt)
+            return response.text
+        except Exception as e:
+            if "429" in str(e) or "RESOURCE_EXHAUSTED" in str(e):
+                wait_time = (2 ** attempt) + 1  # Exponential backoff: 2, 3, 5 seconds
+                logger.warning("Rate limit hit, waiting %ds before retry %d/%d", wait_time, attempt + 1, max_retries)
+                await asyncio.sleep(wait_time)
+            else:
+                raise e
+    
+    # Final attempt without catch
+    response = await model.generate_content_async(prompt)
+    return response.text
+
+
+def _parse_json_response(response: str):
+    """Parse an LLM response as JSON, removing markdown code blocks if present."""
+    cleaned = response.strip()
+    if cleaned.startswith("```json"):
+        cleaned = cleaned[7:]
+    if cleaned.startswith("```"):
+        cleaned = cleaned[3:]
+    if cleaned.endswith("```"):
+        cleaned = cleaned[:-3]
+    return _json_loads(cleaned.strip())
+
+
+def _json_cache_lookup(prompt: str, cache_key: str, cache_namespace: str):
+    """
+    Look a JSON prompt up in the disk cache, then the semantic cache.
+    
+    Returns:
+        (result, key, semantic_cache, embedding); result is None on a miss
+        and the rest is what _json_cache_store needs to record the answer.
+    """
+    key = _cache_key("json", prompt)
+    cached = _cache_get(key)
+    if cached is not None:
+        return cached, key, None, None
+    
+    cache = embedding = None
+    if cache_key is not None:
+        cache = _get_semantic_cache(cache_namespace)
+        embedding = cache.embed(cache_key)
+        cached = cache.lookup(embedding)
+    return cached, key, cache, embedding
+
+
+def _json_cache_store(result, key: str, cache, embedding):
+    """Record a fresh JSON result in the disk and semantic caches."""
+    _cache_set(key, result)
+    if cache is not None:
+        cache.add(embedding, result)
+
+
+def call_gemini_json(prompt: str, cache_key: str = None, cache_namespace: str = "default") -> dict:
     """
     Call Gemini and parse the response as JSON.
     
+    Only parsed responses are stored in the persistent on-disk cache, so an
+    identical prompt is answered without calling the LLM, even from
+    another process, and a malformed reply is never cached.
+    When a cache_key is given, responses are served from a semantic cache:
+    a previously seen key with cosine similarity above the threshold returns
+    its stored response without calling the LLM. The key should be the
+    variable part of the prompt (e.g. the user text), not the full template,
+    and each template should use its own semantic_namespace. Only pass a
+    cache_key when the response does not echo the prompt's text.
+    
     Args:
         prompt: The prompt to send to the LLM (should request JSON output).
+        cache_key: Optional text to match against the semantic cache.
+        cache_namespace: Name of the semantic cache to use.
         
     Returns:
         Parsed JSON response as a dictionary.
     """
-    response = call_gemini(prompt)
-    # Clean response - remove markdown code blocks if present
-    cleaned = response.strip()
-    if cleaned.startswith("```json"):
-        cleaned = cleaned[7:]
-    if cleaned.startswith("```"):
-        cleaned = cleaned[3:]
-    if cleaned.endswith("```"):
-        cleaned = cleaned[:-3]
-    return json.loads(cleaned.strip())
+    cached, key, cache, embedding = _json_cache_lookup(prompt, cache_key, cache_namespace)
+    if cached is not None:
+        return cached
+    
+    # Bypass call_gemini's text cache: the raw reply is cached only once it parses
+    result = _parse_json_response(_generate_content(prompt, 3))
+    _json_cache_store(result, key, cache, embedding)
+    return result
 
 
-async def call_gemini_json_async(prompt: str) -> dict:
+async def call_gemini_json_async(prompt: str, cache_key: str = None, cache_namespace: str = "default") -> dict:
     """
     Call Gemini asynchronously and parse the response as JSON.
+    Uses the same caches as call_gemini_json; the embedding and cache
+    file work runs in a worker thread, the LLM call on the native async client.
     
     Args:
         prompt: The prompt to send to the LLM (should request JSON output).
+        cache_key: Optional text to match against the semantic cache.
+        cache_namespace: Name of the semantic cache to use.
         
     Returns:
         Parsed JSON response as a dictionary.
     """
-    loop = asyncio.get_event_loop()
-    return await loop.run_in_executor(None, call_gemini_json, prompt)
+    loop = asyncio.get_running_loop()
+    cached, key, cache, embedding = await loop.run_in_executor(
+        None, _json_cache_lookup, prompt, cache_key, cache_namespace
+    )
+    if cached is not None:
+        return cached
+    
+    # Bypass call_gemini_async's text cache: the raw reply is cached only once it parses
+    semaphore = _get_semaphore()
+    async with semaphore:
+        text = await _generate_content_async(prompt, 3)
+    result = _parse_json_response(text)
+    await loop.run_in_executor(None, _json_cache_store, result, key, cache, embedding)
+    return result
+
+
+BATCH_PROMPT_HEADER = (
+    "Answer each of the following {count} independent requests separately. "
+    "Each request asks for a JSON object. Respond with ONE JSON array of "
+    "{count} objects, where element i is the JSON answer to request i, in order.\n\n"
+)
 
 
+def call_gemini_json_batch(prompts: list) -> list:
+    """
+    Send several JSON-requesting prompts to Gemini in a single request.
+    The prompts are folded into one numbered request that asks for a
+    JSON array with one answer per prompt.
+    
+    Args:
+        prompts: The prompts to send (each should request JSON output).
+        
+    Returns:
+        List of parsed JSON dictionaries, one per prompt, in order.
+        
+    Raises:
+        ValueError: If the response is not one JSON object per prompt.
+    """
+    if not prompts:
+        return []
+    if len(prompts) == 1:
+        return [call_gemini_json(prompts[0])]
+    
+    combined = BATCH_PROMPT_HEADER.format(count=len(prompts)) + "\n\n".join(
+        f"### Request {i}\n{prompt}" for i, prompt in enumerate(prompts, 1)
+    )
+    try:
+        results = call_gemini_json(combined)
+    except json.JSONDecodeError as e:
+        raise ValueError(f"Batch response is not valid JSON: {e}") from e
+    
+    if (
+        not isinstance(results, list)
+        or len(results) != len(prompts)
+        or not all(isinstance(r, dict) for r in results)
+    ):
+        raise ValueError(f"Expected a JSON array of {len(prompts)} objects from batch call.")
+    return results
+
+
+# Fixed rewrite instruction, sent as the system prompt so it stays a stable cached prefix
+REWRITE_INSTRUCTION = (
+    "Rewrite the user request into ONE clear, concise sentence "
+    "that preserves the original tasks and does NOT add extra explanation, examples, or structure. "
+    "Do NOT expand the request. Do NOT split into multiple parts. "
+    "Output only the improved single-sentence request."
+)
+
+
+@lru_cache(maxsize=1024)
 def llm_rewrite_prompt(raw_prompt: str) -> str:
     """
     Rewrite the prompt using LLM for better semantic understanding.
+    Memoized per prompt in-process; the disk cache covers other processes.
     
     Args:
         raw_prompt: The original user input prompt.
@@ -139,14 +662,20 @@ def llm_rewrite_prompt(raw_prompt: str) -> str:
     Returns:
         A semantically rewritten prompt.
     """
-    rewrite_instruction = (
-        "Rewrite the following user request into ONE clear, concise sentence "
-        "that preserves the original tasks and does NOT add extra explanation, examples, or structure. "
-        "Do NOT expand the request. Do NOT split into multiple parts. "
-        "Output only the improved single-sentence request:\n\n"
-        + raw_prompt
-    )
-    return call_gemini(rewrite_instruction)
+    return call_gemini(raw_prompt, system_instruction=REWRITE_INSTRUCTION)
+
+
+async def llm_rewrite_prompt_async(raw_prompt: str) -> str:
+    """
+    Async version of the prompt rewrite.
+    
+    Args:
+        raw_prompt: The original user input prompt.
+        
+    Returns:
+        A semantically rewritten prompt.
+    """
+    return await call_gemini_async(raw_prompt, system_instruction=REWRITE_INSTRUCTION)
 
 
 def generate_final_answer(prompt: str) -> str:
@@ -162,6 +691,46 @@ def generate_final_answer(prompt: str) -> str:
     return call_gemini(prompt)
 
 
+async def stream_final_answer(prompt: str, max_retries: int = 3):
+    """
+    Stream the final response for the optimized prompt as it is generated.
+    Callers can render or forward each chunk without waiting for the full
+    answer. Streamed answers bypass the response cache.
+    Rate limiting is retried with exponential backoff until the first
+    chunk arrives; once chunks have been yielded, errors propagate.
+    
+    Args:
+        prompt: The optimized prompt to send to the LLM.
+        max_retries: Maximum number of retry attempts.
+        
+    Yields:
+        Text chunks of the final answer, in order.
+    """
+    model = _get_model()
+    semaphore = _get_semaphore()
+    async with semaphore:
+        for attempt in range(max_retries + 1):
+            try:
+                response = await model.generate_content_async(prompt, stream=True)
+                chunks = response.__aiter__()
+                first = await chunks.__anext__()
+                break
+            except StopAsyncIteration:
+                return
+            except Exception as e:
+                # The last attempt is not caught, as in _generate_content_async
+                if attempt < max_retries and ("429" in str(e) or "RESOURCE_EXHAUSTED" in str(e)):
+                    wait_time = (2 ** attempt) + 1  # Exponential backoff: 2, 3, 5 seconds
+                    logger.warning("Rate limit hit, waiting %ds before retry %d/%d", wait_time, attempt + 1, max_retries)
+                    await asyncio.sleep(wait_time)
+                else:
+                    raise e
+        
+        yield first.text
+        async for chunk in chunks:
+            yield chunk.text
+
+
 if __name__ == "__main__":
     test_prompt = "Explain neural networks simply."
     print("Sync call:", call_gemini(test_prompt)[:100], "...")
@@ -170,5 +739,10 @@ if __name__ == "__main__":
     async def test_async():
         result = await call_gemini_async(test_prompt)
         print("Async call:", result[:100], "...")
+        
+        print("Streamed: ", end="")
+        async for chunk in stream_final_answer(test_prompt):
+            print(chunk, end="", flush=True)
+        print()
     
-    asyncio.run(test_async())
+    run_async(test_async())
@@ -2,33 +2,100 @@
 Optimizer Pipeline Module
 
 The main prompt optimization pipeline that runs all analysis modules.
-All detection is LLM-powered with no hardcoded rules.
+All detection is LLM-powered; a rule-based score only lets clearly
+well-formed prompts skip the LLM scoring call.
 
 The optimizer ALWAYS outputs an optimized prompt - it never rejects prompts.
 When prompts are ambiguous or low quality, it uses LLM to improve them.
 """
 
+import asyncio
+import logging
+import os
 import time
+from importlib.util import find_spec
 
-try:
-    from pipeline.intent_handler import detect_intents_full, detect_intents
-    from pipeline.scoring_engine import score_prompt
-    from pipeline.ambiguity_detector import detect_ambiguity, is_ambiguous
-    from pipeline.decomposition_engine import decompose_prompt_full, decompose_prompt
-    from pipeline.context_handler import detect_context_need, needs_context
-    from pipeline.llm_interface import llm_rewrite_prompt, generate_final_answer
-except ImportError:
-    from intent_handler import detect_intents_full, detect_intents
-    from scoring_engine import score_prompt
-    from ambiguity_detector import detect_ambiguity, is_ambiguous
-    from decomposition_engine import decompose_prompt_full, decompose_prompt
-    from context_handler import detect_context_need, needs_context
-    from llm_interface import llm_rewrite_prompt, generate_final_answer
+if find_spec("pipeline") is not None:
+    from pipeline.features import featurize
+    from pipeline.intent_handler import detect_intents_batch_async
+    from pipeline.scoring_engine import has_vague_terms, score_prompt_async, score_prompt_rules
+    from pipeline.analyze import analyze_prompt_async
+    from pipeline.llm_interface import llm_rewrite_prompt_async, generate_final_answer, run_async
+else:
+    from features import featurize
+    from intent_handler import detect_intents_batch_async
+    from scoring_engine import has_vague_terms, score_prompt_async, score_prompt_rules
+    from analyze import analyze_prompt_async
+    from llm_interface import llm_rewrite_prompt_async, generate_final_answer, run_async
+
+
+logger = logging.getLogger(__name__)
+
+# Prompts scoring below this are rewritten by the LLM
+REWRITE_SCORE_THRESHOLD = 10
+
+# Prompts at least this long, with a rule-based score at least CHEAP_SCORE_FLOOR
+# and no vague terms, skip the LLM score call. The floor is the rewrite
+# threshold, so a skipped prompt is never rewritten because of its score.
+CHEAP_MIN_WORDS = 40
+CHEAP_SCORE_FLOOR = REWRITE_SCORE_THRESHOLD
+
+# Seconds to wait for the combined LLM analysis before using neutral defaults
+ANALYSIS_TIMEOUT = float(os.getenv("ANALYSIS_TIMEOUT", "20"))
+
+
+def _cheap_score(features):
+    """
+    Rule-based score for a clearly well-formed prompt, from its PromptFeatures.
+    
+    Returns None (inconclusive) for short prompts, prompts with vague terms,
+    or a rule-based total below CHEAP_SCORE_FLOOR.
+    """
+    if features.word_count < CHEAP_MIN_WORDS or has_vague_terms(features):
+        return None
+    score = score_prompt_rules(features)
+    return score if score["total_score"] >= CHEAP_SCORE_FLOOR else None
+
+
+def _default_analysis(prompt: str) -> dict:
+    """Neutral analysis used when the LLM analysis times out."""
+    reason = "Analysis timed out."
+    return {
+        "ambiguity": {"is_ambiguous": False, "reason": reason, "clarification_needed": ""},
+        "context": {"needs_context": False, "reason": reason},
+        "decomposition": {"subtasks": [prompt], "subtask_intents": [{}], "reasoning": reason},
+        "intent": {},
+    }
+
+
+async def _analyze_with_timeout(prompt: str) -> tuple:
+    """Run the combined analysis; returns (analysis, timed_out)."""
+    try:
+        return await asyncio.wait_for(analyze_prompt_async(prompt), ANALYSIS_TIMEOUT), False
+    except asyncio.TimeoutError:
+        logger.warning("Analysis timed out after %.1fs, using defaults", ANALYSIS_TIMEOUT)
+        return _default_analysis(prompt), True
 
 
 def optimize_prompt(raw_prompt: str, previous_context: str = None) -> str:
+    """
+    Optimize a raw user prompt using LLM analysis (synchronous wrapper).
+    ALWAYS outputs an optimized prompt - never rejects prompts.
+    
+    Args:
+        raw_prompt: The original user input prompt.
+        previous_context: Optional context from previous interactions.
+        
+    Returns:
+        An optimized prompt with improved clarity and structure.
+    """
+    return run_async(optimize_prompt_async(raw_prompt, previous_context))
+
+
+async def optimize_prompt_async(raw_prompt: str, previous_context: str = None) -> str:
     """
     Optimize a raw user prompt using LLM analysis.
+    The independent analysis calls run concurrently.
     ALWAYS outputs an optimized prompt - never rejects prompts.
     
     Args:
@@ -39,36 +106,33 @@ def optimize_prompt(raw_prompt: str, previous_context: str = None) -> str:
         An optimized prompt with improved clarity and structure.
     """
     start_time = time.time()
-    
-    print("[LLM Analysis Starting...]")
-    
-    # STEP 1 — Score the prompt
-    print("  [1/5] Scoring prompt...")
-    score_result = score_prompt(raw_prompt)
-    print(f"       Score: {score_result}")
-    
-    # STEP 2 — Check ambiguity
-    print("  [2/5] Checking ambiguity...")
-    ambiguity_result = detect_ambiguity(raw_prompt)
-    print(f"       Ambiguity: {ambiguity_result}")
-    
-    # STEP 3 — Check context needs
-    print("  [3/5] Checking context needs...")
-    context_result = detect_context_need(raw_prompt)
-    print(f"       Context: {context_result}")
-    
-    # STEP 4 — Detect intents
-    print("  [4/5] Detecting intents...")
-    intent_result = detect_intents_full(raw_prompt)
-    print(f"       Intent: {intent_result}")
-    
-    # STEP 5 — Decompose into subtasks
-    print("  [5/5] Decomposing prompt...")
-    decomposition_result = decompose_prompt_full(raw_prompt)
-    print(f"       Decomposition: {decomposition_result}")
+    features = featurize(raw_prompt)
+    
+    logger.debug("LLM analysis starting")
+    
+    # STEPS 1-5 — Score, ambiguity, context, intents, and decomposition (concurrent)
+    logger.debug("[1-5/5] Scoring and checking ambiguity, context, intents, and decomposition")
+    score_result = _cheap_score(features)
+    if score_result is not None:
+        # Clearly well-formed prompt: trust the rule-based score, skip the LLM score call
+        analysis, timed_out = await _analyze_with_timeout(raw_prompt)
+    else:
+        score_result, (analysis, timed_out) = await asyncio.gather(
+            score_prompt_async(raw_prompt),
+            _analyze_with_timeout(raw_prompt),
+        )
+    ambiguity_result = analysis["ambiguity"]
+    context_result = analysis["context"]
+    intent_result = analysis["intent"]
+    decomposition_result = analysis["decomposition"]
+    logger.debug("Score: %s", score_result)
+    logger.debug("Ambiguity: %s", ambiguity_result)
+    logger.debug("Context: %s", context_result)
+    logger.debug("Intent: %s", intent_result)
+    logger.debug("Decomposition: %s", decomposition_result)
     
     analysis_time = time.time() - start_time
-    print(f"[LLM Analysis Complete in {analysis_time:.2f}s]")
+    logger.debug("LLM analysis complete in %.2fs", analysis_time)
     
     # STEP 6 — Attach context if needed
     working_prompt = raw_prompt
@@ -80,20 +144,33 @@ def optimize_prompt(raw_prompt: str, previous_context: str = None) -> str:
     total_score = score_result.get("total_score", 0)
     is_ambiguous = ambiguity_result.get("is_ambiguous", False)
     
-    llm_triggered = False
-    if total_score < 10 or is_ambiguous:
-        print("[LLM Rewrite Triggered - Improving prompt clarity]")
-        llm_triggered = True
-        working_prompt = llm_rewrite_prompt(working_prompt)
+    # Skip the rewrite when the analysis already timed out; the LLM is struggling
+    llm_triggered = not timed_out and (total_score < REWRITE_SCORE_THRESHOLD or is_ambiguous)
     
     # STEP 8 — Run intent detection on EACH subtask for specific instructions
-    subtasks = decomposition_result.get("subtasks", [working_prompt])
-    
-    print("[Generating subtask-specific instructions...]")
+    # Per-subtask intents usually arrive with the combined analysis already
+    subtasks = decomposition_result.get("subtasks")
+    precomputed = decomposition_result.get("subtask_intents")
+    rewritten_prompt = None
+    if llm_triggered:
+        logger.info("LLM rewrite triggered - improving prompt clarity")
+    if subtasks is None:
+        # Without a decomposition, the (possibly rewritten) prompt is the subtask
+        if llm_triggered:
+            rewritten_prompt = await llm_rewrite_prompt_async(working_prompt)
+        subtasks = [rewritten_prompt or working_prompt]
+        subtask_intents = await detect_intents_batch_async(subtasks, precomputed)
+    elif llm_triggered:
+        # The subtasks do not depend on the rewrite, so both run concurrently
+        rewritten_prompt, subtask_intents = await asyncio.gather(
+            llm_rewrite_prompt_async(working_prompt),
+            detect_intents_batch_async(subtasks, precomputed),
+        )
+    else:
+        subtask_intents = await detect_intents_batch_async(subtasks, precomputed)
+    logger.debug("Generated subtask-specific instructions for %d subtasks", len(subtasks))
     subtask_instructions = []
-    for i, subtask in enumerate(subtasks, 1):
-        print(f"  [Subtask {i}/{len(subtasks)}] Detecting intent for: {subtask[:50]}...")
-        subtask_intent = detect_intents_full(subtask)
+    for subtask, subtask_intent in zip(subtasks, subtask_intents):
         subtask_instructions.append({
             "subtask": subtask,
             "primary_intent": subtask_intent.get("primary_intent", "general"),
@@ -101,32 +178,38 @@ def optimize_prompt(raw_prompt: str, previous_context: str = None) -> str:
         })
     
     # Format output with subtask-instruction mapping
-    optimized_output = ""
+    parts = []
     
     if llm_triggered:
-        optimized_output += "[LLM Rewrite Triggered]\n\n"
+        parts.append("[LLM Rewrite Triggered]\n\n")
+        if rewritten_prompt and rewritten_prompt not in subtasks:
+            parts.append(f"## Rewritten Prompt: {rewritten_prompt}\n\n")
     
     # Add subtasks with their specific instructions
     for i, item in enumerate(subtask_instructions, 1):
-        optimized_output += f"## Sub-Task {i}: {item['subtask']}\n"
-        optimized_output += f"   Intent: {item['primary_intent']}\n"
-        optimized_output += "   Instructions:\n"
-        for inst in item["instructions"]:
-            optimized_output += f"   - {inst}\n"
-        optimized_output += "\n"
+        parts.append(f"## Sub-Task {i}: {item['subtask']}\n")
+        parts.append(f"   Intent: {item['primary_intent']}\n")
+        parts.append("   Instructions:\n")
+        parts.extend(f"   - {inst}\n" for inst in item["instructions"])
+        parts.append("\n")
     
     # Add score info
-    optimized_output += f"[Quality Score: {total_score}/15]"
+    parts.append(f"[Quality Score: {total_score}/15]")
+    optimized_output = "".join(parts)
     
-    # Debug output
-    print("----- OPTIMIZED PROMPT -----")
-    print(optimized_output)
-    print("-" * 40)
+    logger.debug("Optimized prompt:\n%s", optimized_output)
     
     return optimized_output
 
 
 if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Run the prompt optimizer on sample prompts.")
+    parser.add_argument("--verbose", action="store_true", help="Log per-step analysis details.")
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.DEBUG if args.verbose else logging.INFO)
+
     tests = [
         ("Explain CNN and compare with RNN", None),
         ("Explain the model", None),
@@ -2,13 +2,23 @@
 Scoring Engine Module
 
 Scores prompts to evaluate quality using LLM analysis.
-All scoring is LLM-powered with no hardcoded rules.
+A cheap rule-based estimate is also available for pre-filtering, so
+clearly well-formed prompts can skip the LLM round-trip.
 """
 
-try:
-    from pipeline.llm_interface import call_gemini_json, call_gemini_json_async
-except ImportError:
-    from llm_interface import call_gemini_json, call_gemini_json_async
+import asyncio
+import logging
+import os
+import re
+from functools import lru_cache
+from importlib.util import find_spec
+
+if find_spec("pipeline") is not None:
+    from pipeline.features import featurize
+    from pipeline.llm_interface import call_gemini_json, call_gemini_json_async, coalesce, escape_quotes, preload_semantic_cache, run_async, semantic_namespace, split_template
+else:
+    from features import featurize
+    from llm_interface import call_gemini_json, call_gemini_json_async, coalesce, escape_quotes, preload_semantic_cache, run_async, semantic_namespace, split_template
 
 
 SCORING_PROMPT = '''Evaluate the quality of the following user prompt on a scale.
@@ -29,10 +39,55 @@ Respond in JSON format:
     "feedback": "brief feedback on how to improve the prompt"
 }}'''
 
+_PROMPT_PREFIX, _PROMPT_SUFFIX = split_template(SCORING_PROMPT)
+_CACHE_NAMESPACE = semantic_namespace("score", SCORING_PROMPT)
+# Load the encoder now so the first score is not spent inside SCORE_TIMEOUT
+preload_semantic_cache(_CACHE_NAMESPACE)
+
+logger = logging.getLogger(__name__)
+
+# Seconds to wait for the async LLM score before using the rule-based estimate
+SCORE_TIMEOUT = float(os.getenv("SCORE_TIMEOUT", "10"))
+
+# In-flight async requests keyed by normalized prompt
+_pending = {}
+
+_WS_RE = re.compile(r"\s+")
+
+# Keyword sets for the rule-based estimate
+_ACTION_WORDS = frozenset((
+    "explain", "compare", "build", "analyze", "write", "create", "describe",
+    "list", "summarize", "implement", "design", "evaluate",
+))
+_VAGUE_WORDS = frozenset(("something", "stuff", "things", "thing", "anything", "whatever", "etc"))
+_TECH_WORDS = frozenset((
+    "python", "algorithm", "neural", "database", "model", "api", "function",
+    "class", "network", "sql", "cnn", "rnn",
+))
+_CONSTRAINT_WORDS = frozenset((
+    "step", "example", "examples", "code", "table", "format", "including",
+    "covering", "using", "without",
+))
+_FORMAT_WORDS = frozenset(("list", "table", "bullet", "bullets", "steps", "markdown", "json", "sections"))
+_STRUCTURE_PUNCT = frozenset(",:;")
+
+
+def _normalize(prompt: str) -> str:
+    """Collapse whitespace so trivially different prompts share a cache entry."""
+    prompt = prompt.strip()
+    if "  " in prompt or "\t" in prompt or "\n" in prompt or "\r" in prompt:
+        prompt = _WS_RE.sub(" ", prompt)
+    return prompt
+
+
+def _format_prompt(prompt: str) -> str:
+    return _PROMPT_PREFIX + escape_quotes(prompt) + _PROMPT_SUFFIX
+
 
 def score_prompt(prompt: str) -> dict:
     """
     Score a prompt based on clarity, specificity, and structure using LLM.
+    Results are memoized per normalized prompt.
     
     Args:
         prompt: The user prompt to evaluate.
@@ -40,13 +95,21 @@ def score_prompt(prompt: str) -> dict:
     Returns:
         A dictionary containing individual scores and total score.
     """
-    formatted_prompt = SCORING_PROMPT.format(prompt=prompt)
-    return call_gemini_json(formatted_prompt)
+    return _score_normalized(_normalize(prompt))
+
+
+@lru_cache(maxsize=4096)
+def _score_normalized(prompt: str) -> dict:
+    formatted_prompt = _format_prompt(prompt)
+    return call_gemini_json(formatted_prompt, cache_key=prompt, cache_namespace=_CACHE_NAMESPACE)
 
 
 async def score_prompt_async(prompt: str) -> dict:
     """
     Async version of prompt scoring for parallel processing.
+    Concurrent calls for the same normalized prompt share one request.
+    Falls back to the rule-based estimate if the LLM takes longer than
+    SCORE_TIMEOUT seconds.
     
     Args:
         prompt: The user prompt to evaluate.
@@ -54,13 +117,59 @@ async def score_prompt_async(prompt: str) -> dict:
     Returns:
         A dictionary containing individual scores and total score.
     """
-    formatted_prompt = SCORING_PROMPT.format(prompt=prompt)
-    return await call_gemini_json_async(formatted_prompt)
+    prompt = _normalize(prompt)
+    formatted_prompt = _format_prompt(prompt)
+    try:
+        return await asyncio.wait_for(coalesce(_pending, prompt, lambda: call_gemini_json_async(
+            formatted_prompt, cache_key=prompt, cache_namespace=_CACHE_NAMESPACE
+        )), SCORE_TIMEOUT)
+    except asyncio.TimeoutError:
+        logger.warning("Scoring timed out after %.1fs, using rule-based estimate", SCORE_TIMEOUT)
+        return score_prompt_rules(prompt)
 
 
-if __name__ == "__main__":
-    import asyncio
+def has_vague_terms(prompt) -> bool:
+    """Check whether the prompt (str or PromptFeatures) uses vague filler words like "stuff"."""
+    return not _VAGUE_WORDS.isdisjoint(featurize(prompt).token_set)
+
+
+def score_prompt_rules(prompt) -> dict:
+    """
+    Estimate the prompt score with keyword and length heuristics (no LLM call).
+    
+    Args:
+        prompt: The user prompt to evaluate, or its PromptFeatures.
+        
+    Returns:
+        A dictionary in the same shape as score_prompt's result.
+    """
+    features = featurize(prompt)
+    prompt = features.raw
+    words = features.token_set
+    word_count = features.word_count
     
+    clarity = min(5, 2 * (not _ACTION_WORDS.isdisjoint(words))
+                  + (word_count >= 5)
+                  + _VAGUE_WORDS.isdisjoint(words)
+                  + (prompt.rstrip()[-1:] in ("?", ".")))
+    specificity = min(5, len(words & _TECH_WORDS)
+                      + len(words & _CONSTRAINT_WORDS)
+                      + (word_count >= 15)
+                      + (word_count >= 40))
+    structure = min(5, 2 * (not _FORMAT_WORDS.isdisjoint(words))
+                    + (not _STRUCTURE_PUNCT.isdisjoint(prompt))
+                    + ("\n" in prompt)
+                    + (word_count >= 20))
+    return {
+        "clarity": clarity,
+        "specificity": specificity,
+        "structure": structure,
+        "total_score": clarity + specificity + structure,
+        "feedback": "Estimated with rule-based heuristics.",
+    }
+
+
+if __name__ == "__main__":
     tests = [
         "tell me something",
         "Explain neural network architecture with example",
@@ -80,4 +189,4 @@ if __name__ == "__main__":
             print(f"  Feedback: {result.get('feedback', 'N/A')}")
             print()
     
-    asyncio.run(run_tests())
+    run_async(run_tests())
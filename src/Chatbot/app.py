@@ -6,25 +6,31 @@ import streamlit as st
 import os
 from dotenv import load_dotenv
 
-load_dotenv()
+@st.cache_resource
+def init_env():
+    load_dotenv()
 
-os.environ["GOOGLE_API_KEY"] = os.getenv("GOOGLE_API_KEY")
-os.environ["LANGCHAIN_TRACING_V2"] = "true"  # Changed from LANGSMITH_TRACING
-os.environ["LANGCHAIN_API_KEY"] = os.getenv("LANGSMITH_API_KEY")  # Note: can be LANGCHAIN or LANGSMITH
-os.environ["LANGCHAIN_PROJECT"] = os.getenv("LANGSMITH_PROJECT")
-os.environ["LANGCHAIN_ENDPOINT"] = "https://api.smith.langchain.com"
+    os.environ["GOOGLE_API_KEY"] = os.getenv("GOOGLE_API_KEY")
+    os.environ["LANGCHAIN_TRACING_V2"] = "true"  # Changed from LANGSMITH_TRACING
+    os.environ["LANGCHAIN_API_KEY"] = os.getenv("LANGSMITH_API_KEY")  # Note: can be LANGCHAIN or LANGSMITH
+    os.environ["LANGCHAIN_PROJECT"] = os.getenv("LANGSMITH_PROJECT")
+    os.environ["LANGCHAIN_ENDPOINT"] = "https://api.smith.langchain.com"
 
-prompt=ChatPromptTemplate.from_messages([
-    ("system", "You are a helpful assistant. Please respond to the user queries"),
-    ("user","Question: {question}")
-])
+# Built once per process instead of on every rerun
+@st.cache_resource
+def get_chain():
+    prompt=ChatPromptTemplate.from_messages([
+        ("system", "You are a helpful assistant. Please respond to the user queries"),
+        ("user","Question: {question}")
+    ])
+    llm=ChatGoogleGenerativeAI(model="gemini-2.5-flash")
+    output_parser=StrOutputParser()
+    return prompt|llm|output_parser
+
+init_env()
 
 st.title('Langchain Demo With Gemini Flash 2.5')
 input_text=st.text_input("Search the topic you want to know about")
 
-llm=ChatGoogleGenerativeAI(model="gemini-2.5-flash")
-output_parser=StrOutputParser()
-chain=prompt|llm|output_parser
-
 if input_text:
-    st.write(chain.invoke({"question":input_text})) 
\ No newline at end of file
+    st.write_stream(get_chain().stream({"question":input_text}))
\ No newline at end of file